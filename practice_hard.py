@@ -1,10 +1,22 @@
 import sys
 import os
 import json
+import stat
+import time
+import socket
+import wave
+import hashlib
 import base64
-import tempfile
+import sqlite3
+import asyncio
+import argparse
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import numpy as np
+
 from PyQt5.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -24,10 +36,12 @@ from PyQt5.QtWidgets import (
     QSpinBox,
     QInputDialog,
     QMenu,
+    QTreeWidget,
+    QTreeWidgetItem,
 )
 from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
-from PyQt5.QtCore import Qt, QEvent, QUrl, pyqtSignal, QTimer
-from PyQt5.QtGui import QPixmap, QFont, QFontMetrics, QPainter, QPen, QColor
+from PyQt5.QtCore import Qt, QEvent, QUrl, pyqtSignal, QTimer, QThread, QObject, QStandardPaths
+from PyQt5.QtGui import QPixmap, QImage, QFont, QFontMetrics, QPainter, QPen, QColor, qRgb
 
 from mutagen import File as MutagenFile
 from mutagen.flac import FLAC, Picture
@@ -55,6 +69,25 @@ RED_SLIM = (
 
 BUFFER_MS = 250  # Skip‑protection buffer when looping
 
+SPEC_FFT = 1024  # STFT window length in samples
+SPEC_COLUMNS = 480  # Time columns rendered per loop slice
+SPEC_BLOCK = 24  # Columns computed per worker step
+SPEC_MAX_HZ = 8_000  # Highest frequency drawn in the spectrogram
+SPEC_FLOOR_DB = -90  # Level mapped to black
+SPEC_CACHE_SIZE = 16  # Spectrograms kept in memory
+SPEC_COLORS = [qRgb(min(255, 2 * i), max(0, 2 * i - 255), 0) for i in range(256)]
+
+CONTROL_EVENT_MS = 50  # Minimum interval between streamed position events
+CONTROL_MAX_BACKLOG = 1 << 20  # Drop subscribers with more unsent bytes than this
+
+TELEMETRY_BUFFER = 4096  # Practice events kept in memory between flushes
+TELEMETRY_FLUSH_MS = 15_000  # Interval between batched writes to the practice log
+TELEMETRY_JUMP_MS = 1_000  # Larger position jumps are seeks, not played time
+TELEMETRY_SETTLE_MS = 500  # Speed must stay unchanged this long before it is logged
+
+RENDER_CACHE_QUOTA = 512 * 1024 * 1024  # Bytes of rendered slices kept on disk
+RENDER_ORPHAN_AGE_S = 3600  # Partial exports older than this are left over from a crash
+
 # -----------------------------------------------------------------------------
 #   Helper dialogs
 # -----------------------------------------------------------------------------
@@ -115,6 +148,35 @@ class PresetEditor(QDialog):
         return [s.value() for s in self.spins]
 
 
+class StatsDialog(QDialog):
+    """Read‑only tree of practice totals grouped by song, then by range and speed."""
+
+    def __init__(self, rows, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Practice Stats")
+        self.resize(560, 420)
+        tree = QTreeWidget(self)
+        tree.setHeaderLabels(["Song / Range", "Speed", "Loops", "Minutes"])
+        songs, totals = {}, {}
+        for song, start_ms, end_ms, speed, reps, ms in rows:
+            if song not in songs:
+                songs[song] = QTreeWidgetItem(tree, [song])
+                totals[song] = [0, 0]
+            label = f"{AudioPlayer._fmt(start_ms)} → {AudioPlayer._fmt(end_ms)}" if end_ms else "FULL"
+            QTreeWidgetItem(songs[song], [label, f"{speed}%", str(reps), f"{ms / 60_000:.1f}"])
+            totals[song][0] += reps
+            totals[song][1] += ms
+        for song, (reps, ms) in totals.items():
+            songs[song].setText(2, str(reps))
+            songs[song].setText(3, f"{ms / 60_000:.1f}")
+        tree.resizeColumnToContents(0)
+        btns = QDialogButtonBox(QDialogButtonBox.Close)
+        btns.rejected.connect(self.reject)
+        layout = QVBoxLayout(self)
+        layout.addWidget(tree)
+        layout.addWidget(btns)
+
+
 # -----------------------------------------------------------------------------
 #   Custom widgets
 # -----------------------------------------------------------------------------
@@ -162,6 +224,495 @@ class SeekSlider(QSlider):
         super().mousePressEvent(ev)
 
 
+# -----------------------------------------------------------------------------
+#   Spectrogram
+# -----------------------------------------------------------------------------
+
+
+class SpectrogramEntry:
+    """Cached spectrogram pixels for one (range, FFT settings) key."""
+
+    def __init__(self):
+        self.data = None  # uint8 array (rows, SPEC_COLUMNS), highest frequency first
+        self.done = 0  # Number of columns computed so far
+
+
+class SpectrogramWorker(QThread):
+    """Background thread filling a SpectrogramEntry block by block."""
+
+    progress = pyqtSignal(object)
+
+    def __init__(self, key, entry, loader, parent=None):
+        super().__init__(parent)
+        self.key, self.entry, self.loader = key, entry, loader
+        self.cancelled = False
+
+    def run(self):
+        try:
+            seg = self.loader()
+        except Exception:
+            self.cancelled = True
+            return
+        samples = np.array(seg.get_array_of_samples(), dtype=np.float32)
+        if seg.channels > 1:
+            samples = samples.reshape(-1, seg.channels).mean(axis=1)
+        samples /= float(1 << (8 * seg.sample_width - 1))
+        hop = max(1, (len(samples) - SPEC_FFT) // (SPEC_COLUMNS - 1))
+        needed = SPEC_FFT + hop * (SPEC_COLUMNS - 1)
+        if len(samples) < needed:
+            samples = np.pad(samples, (0, needed - len(samples)))
+        rows = min(SPEC_FFT // 2 + 1, SPEC_MAX_HZ * SPEC_FFT // seg.frame_rate + 1)
+        if self.entry.data is None:
+            self.entry.data = np.zeros((rows, SPEC_COLUMNS), dtype=np.uint8)
+        window = np.hanning(SPEC_FFT).astype(np.float32)
+        scale = 2.0 / window.sum()
+        offsets = np.arange(SPEC_FFT)
+        while self.entry.done < SPEC_COLUMNS and not self.cancelled:
+            first = self.entry.done
+            last = min(first + SPEC_BLOCK, SPEC_COLUMNS)
+            frames = samples[(np.arange(first, last) * hop)[:, None] + offsets] * window
+            mag = np.abs(np.fft.rfft(frames, axis=1)[:, :rows]) * scale
+            db = 20 * np.log10(mag + 1e-10)
+            level = np.clip((db - SPEC_FLOOR_DB) * (255 / -SPEC_FLOOR_DB), 0, 255)
+            self.entry.data[::-1, first:last] = level.T.astype(np.uint8)
+            self.entry.done = last
+            self.progress.emit(self.key)
+
+
+class SpectrogramView(QWidget):
+    """Panel showing the spectrogram of the active loop, filled in as blocks finish."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.key = None
+        self._cache = OrderedDict()
+        self._workers = []
+        self._pixmap = None
+        self.setFixedHeight(120)
+        self.hide()
+
+    def show_range(self, key, loader):
+        """Display the spectrogram for *key*, computing missing columns via *loader*."""
+        self.key = key
+        self._pixmap = None
+        entry = self._cache.pop(key, None) or SpectrogramEntry()
+        self._cache[key] = entry
+        while len(self._cache) > SPEC_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        for w in self._workers:
+            w.cancelled = w.entry is not entry
+        if entry.done < SPEC_COLUMNS and not any(w.entry is entry for w in self._workers):
+            self._start_worker(key, entry, loader)
+        self.show()
+        self.update()
+
+    def clear(self):
+        """Hide the panel and stop any pending computation."""
+        self.key = None
+        self._pixmap = None
+        for w in self._workers:
+            w.cancelled = True
+        self.hide()
+
+    def stop(self):
+        """Cancel and join all worker threads (used on shutdown)."""
+        self.clear()
+        for w in list(self._workers):
+            w.wait()
+
+    def _start_worker(self, key, entry, loader):
+        worker = SpectrogramWorker(key, entry, loader, self)
+        worker.progress.connect(self._block_ready)
+        worker.finished.connect(lambda w=worker: self._worker_finished(w))
+        self._workers.append(worker)
+        worker.start()
+
+    def _worker_finished(self, worker):
+        self._workers.remove(worker)
+        worker.deleteLater()
+        entry = self._cache.get(self.key)
+        if entry is worker.entry and entry.done < SPEC_COLUMNS and not worker.cancelled:
+            self._start_worker(worker.key, entry, worker.loader)
+
+    def _block_ready(self, key):
+        if key == self.key:
+            self._pixmap = None
+            self.update()
+
+    def resizeEvent(self, ev):
+        self._pixmap = None
+        super().resizeEvent(ev)
+
+    def paintEvent(self, _):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.black)
+        entry = self._cache.get(self.key)
+        if entry is None or entry.data is None:
+            return
+        if self._pixmap is None:
+            data = entry.data
+            img = QImage(data.data, data.shape[1], data.shape[0], data.strides[0], QImage.Format_Indexed8)
+            img.setColorTable(SPEC_COLORS)
+            self._pixmap = QPixmap.fromImage(img.scaled(self.size(), Qt.IgnoreAspectRatio, Qt.SmoothTransformation))
+        painter.drawPixmap(0, 0, self._pixmap)
+
+
+# -----------------------------------------------------------------------------
+#   Control server
+# -----------------------------------------------------------------------------
+
+
+class ControlBridge(QObject):
+    """Carries control‑server commands from the asyncio thread to the GUI thread."""
+
+    command = pyqtSignal(str, list, object)
+
+
+class ControlServer:
+    """Local asyncio server accepting line‑based commands from pedals and scripts.
+
+    Each request is one line such as ``toggle``, ``skip -5`` or ``range 1:05 1:20``
+    and receives a one‑line JSON reply. ``subscribe`` additionally streams
+    position and state events to the connection. The first unrecognised line
+    closes the connection, so stray protocols such as HTTP cannot drive it.
+    """
+
+    COMMANDS = frozenset({"play", "pause", "toggle", "skip", "restart", "range", "full", "speed", "next", "state", "subscribe"})
+
+    def __init__(self, bridge, port=None, socket_path=None):
+        self.bridge = bridge
+        self.port, self.socket_path = port, socket_path
+        self.loop = asyncio.new_event_loop()
+        self._subscribers = set()
+        self._server = None
+        self._socket_id = None
+        self._thread = threading.Thread(target=self._run, name="control-server", daemon=True)
+
+    def start(self):
+        """Bind the socket (raising OSError on failure) and serve on a daemon thread."""
+        if self.socket_path:
+            self._remove_stale_socket()
+            coro = asyncio.start_unix_server(self._handle, path=self.socket_path)
+        else:
+            coro = asyncio.start_server(self._handle, "127.0.0.1", self.port)
+        self._server = self.loop.run_until_complete(coro)
+        if self.socket_path:
+            st = os.lstat(self.socket_path)
+            self._socket_id = (st.st_dev, st.st_ino)
+        self._thread.start()
+
+    def stop(self):
+        """Shut the server down and remove its Unix socket if it is still ours."""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=1)
+        if self._socket_id:
+            try:
+                st = os.lstat(self.socket_path)
+                if (st.st_dev, st.st_ino) == self._socket_id:
+                    os.unlink(self.socket_path)
+            except OSError:
+                pass
+
+    def _remove_stale_socket(self):
+        """Unlink a leftover socket at our path; refuse non‑sockets and live servers."""
+        try:
+            st = os.lstat(self.socket_path)
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(st.st_mode):
+            raise FileExistsError(f"{self.socket_path} exists and is not a socket")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(self.socket_path)
+            except ConnectionRefusedError:
+                pass
+            else:
+                raise OSError(f"another control server is listening on {self.socket_path}")
+        os.unlink(self.socket_path)
+
+    def publish(self, event):
+        """Send an event dict to all subscribers; safe to call from any thread."""
+        if self._subscribers:
+            line = (json.dumps(event) + "\n").encode()
+            self.loop.call_soon_threadsafe(self._broadcast, line)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+        self._server.close()
+        tasks = asyncio.all_tasks(self.loop)
+        for task in tasks:
+            task.cancel()
+        self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        self.loop.run_until_complete(self._server.wait_closed())
+        self.loop.close()
+
+    def _broadcast(self, line):
+        for writer in list(self._subscribers):
+            if writer.is_closing() or writer.transport.get_write_buffer_size() > CONTROL_MAX_BACKLOG:
+                self._subscribers.discard(writer)
+                writer.close()
+            else:
+                writer.write(line)
+
+    async def _handle(self, reader, writer):
+        try:
+            while line := await reader.readline():
+                parts = line.decode("utf-8", "replace").split()
+                if not parts:
+                    continue
+                name, args = parts[0].lower(), parts[1:]
+                if name not in self.COMMANDS:
+                    writer.write((json.dumps({"ok": False, "error": f"unknown command: {name}"}) + "\n").encode())
+                    await writer.drain()
+                    break
+                if name == "subscribe":
+                    self._subscribers.add(writer)
+                    reply = {"ok": True}
+                else:
+                    fut = self.loop.create_future()
+                    self.bridge.command.emit(name, args, lambda r, f=fut: self.loop.call_soon_threadsafe(self._resolve, f, r))
+                    reply = await fut
+                writer.write((json.dumps(reply) + "\n").encode())
+                await writer.drain()
+        except (ConnectionError, ValueError, asyncio.LimitOverrunError, asyncio.CancelledError):
+            pass
+        finally:
+            self._subscribers.discard(writer)
+            writer.close()
+
+    @staticmethod
+    def _resolve(fut, result):
+        if not fut.done():
+            fut.set_result(result)
+
+
+# -----------------------------------------------------------------------------
+#   Practice telemetry
+# -----------------------------------------------------------------------------
+
+
+class PracticeLog:
+    """Practice telemetry kept in a ring buffer and flushed in batches to SQLite.
+
+    ``record`` only appends to an in‑memory deque, so playback never waits on
+    disk. A single writer thread owns the database and maintains a rolled‑up
+    ``totals`` table, keeping statistics queries cheap over years of events.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS songs(id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);"
+        "CREATE TABLE IF NOT EXISTS events(ts REAL, kind TEXT, song_id INT, start_ms INT, end_ms INT, speed INT, ms INT);"
+        "CREATE TABLE IF NOT EXISTS totals(song_id INT, start_ms INT, end_ms INT, speed INT, reps INT, ms INT,"
+        " PRIMARY KEY(song_id, start_ms, end_ms, speed)) WITHOUT ROWID;"
+    )
+
+    def __init__(self, db_path):
+        self._events = deque(maxlen=TELEMETRY_BUFFER)
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="practice-log")
+        self._db = None
+        self._io.submit(self._connect, db_path)
+
+    def record(self, kind, song, start_ms, end_ms, speed, ms=0):
+        """Queue an event; *end_ms* of 0 denotes the full track."""
+        if song:
+            self._events.append((time.time(), kind, song, start_ms, end_ms, speed, ms))
+
+    def flush(self):
+        """Hand all buffered events to the writer thread and return its future."""
+        batch = []
+        while self._events:
+            batch.append(self._events.popleft())
+        return self._io.submit(self._write, batch)
+
+    def totals(self):
+        """Return (song, start_ms, end_ms, speed, reps, ms) rows including unflushed events."""
+        self.flush()
+        return self._io.submit(self._query).result()
+
+    def close(self):
+        """Write remaining events and close the database."""
+        self.flush()
+        self._io.submit(self._disconnect)
+        self._io.shutdown(wait=True)
+
+    def _connect(self, db_path):
+        try:
+            self._db = sqlite3.connect(db_path)
+            self._db.executescript(self.SCHEMA)
+        except sqlite3.Error:
+            self._db = None
+
+    def _disconnect(self):
+        if self._db:
+            self._db.close()
+            self._db = None
+
+    def _write(self, batch):
+        if not batch or not self._db:
+            return
+        try:
+            with self._db:
+                ids = {}
+                for song in {e[2] for e in batch}:
+                    self._db.execute("INSERT OR IGNORE INTO songs(name) VALUES (?)", (song,))
+                    ids[song] = self._db.execute("SELECT id FROM songs WHERE name = ?", (song,)).fetchone()[0]
+                rows = [(ts, kind, ids[song], st, ed, spd, ms) for ts, kind, song, st, ed, spd, ms in batch]
+                self._db.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                rollup = {}
+                for _, kind, song_id, st, ed, spd, ms in rows:
+                    if kind in ("loop", "play"):
+                        reps, total = rollup.get((song_id, st, ed, spd), (0, 0))
+                        rollup[(song_id, st, ed, spd)] = (reps + (kind == "loop"), total + ms)
+                self._db.executemany(
+                    "INSERT INTO totals VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(song_id, start_ms, end_ms, speed)"
+                    " DO UPDATE SET reps = reps + excluded.reps, ms = ms + excluded.ms",
+                    [(*k, reps, ms) for k, (reps, ms) in rollup.items()],
+                )
+        except sqlite3.Error:
+            pass
+
+    def _query(self):
+        if not self._db:
+            return []
+        return self._db.execute(
+            "SELECT s.name, t.start_ms, t.end_ms, t.speed, t.reps, t.ms FROM totals t"
+            " JOIN songs s ON s.id = t.song_id ORDER BY s.name, t.start_ms, t.end_ms, t.speed"
+        ).fetchall()
+
+
+# -----------------------------------------------------------------------------
+#   Render cache
+# -----------------------------------------------------------------------------
+
+
+class RenderCache:
+    """Disk cache of rendered loop slices, content‑addressed and LRU‑evicted.
+
+    Slices are exported under a ``*.part`` name and atomically renamed, so a
+    crash can only leave partial files behind; stale ones are removed at
+    startup. The directory is private to the user.
+    """
+
+    def __init__(self, root, quota):
+        self.root = Path(root)
+        self.quota = quota
+        self.root.mkdir(mode=0o700, parents=True, exist_ok=True)
+        os.chmod(self.root, 0o700)
+        cutoff = time.time() - RENDER_ORPHAN_AGE_S
+        for orphan in self.root.glob("*.part"):
+            try:
+                if orphan.stat().st_mtime < cutoff:
+                    orphan.unlink()
+            except OSError:
+                pass
+        self._evict()
+
+    @staticmethod
+    def key(path, start_ms, end_ms):
+        """Return the cache key for a slice of *path*, tied to the file's size and mtime."""
+        st = os.stat(path)
+        ident = f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}|{start_ms}|{end_ms}"
+        return hashlib.sha1(ident.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached WAV path for *key* (marking it recently used) or None."""
+        path = self.root / f"{key}.wav"
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return str(path)
+
+    def put(self, key, segment):
+        """Export *segment* into the cache and return its WAV path."""
+        path = self.root / f"{key}.wav"
+        part = self.root / f"{key}.{os.getpid()}.part"
+        try:
+            segment.export(str(part), format="wav")
+            os.replace(part, path)
+        except BaseException:
+            try:
+                part.unlink()
+            except OSError:
+                pass
+            raise
+        self._evict(keep=path)
+        return str(path)
+
+    def _evict(self, keep=None):
+        """Delete least recently used slices until the cache fits its quota."""
+        files = []
+        for f in self.root.glob("*.wav"):
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, f))
+        total = sum(size for _, size, _ in files)
+        for _, size, f in sorted(files):
+            if total <= self.quota:
+                break
+            if f == keep:
+                continue
+            try:
+                f.unlink()
+                total -= size
+            except OSError:
+                pass
+
+
+# -----------------------------------------------------------------------------
+#   Cover art
+# -----------------------------------------------------------------------------
+
+
+class CoverLoader(QThread):
+    """Background thread extracting, decoding and scaling embedded album art."""
+
+    loaded = pyqtSignal(int, QImage)
+
+    def __init__(self, generation, path, parent=None):
+        super().__init__(parent)
+        self.generation, self.path = generation, path
+        self.cancelled = False
+
+    def run(self):
+        try:
+            data = self._extract(self.path)
+        except Exception:
+            return
+        if not data or self.cancelled:
+            return
+        img = QImage.fromData(data)
+        if img.isNull() or self.cancelled:
+            return
+        self.loaded.emit(self.generation, img.scaled(500, 500, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation))
+
+    @staticmethod
+    def _extract(path):
+        """Return the raw bytes of the first embedded picture, or None."""
+        audio = MutagenFile(path, easy=False)
+        if isinstance(audio, FLAC) and getattr(audio, "pictures", None):
+            return audio.pictures[0].data
+        if isinstance(audio, MP3):
+            tags = audio.tags or ID3(path)
+            for tag in tags.values():
+                if isinstance(tag, APIC):
+                    return tag.data
+        elif isinstance(audio, MP4):
+            covr = audio.tags.get("covr")
+            if covr and isinstance(covr[0], MP4Cover):
+                return bytes(covr[0])
+        elif isinstance(audio, OggVorbis):
+            pic_data = audio.get("metadata_block_picture")
+            if pic_data:
+                pic = Picture()
+                pic.parse(base64.b64decode(pic_data[0]))
+                return pic.data
+        return None
+
+
 # -----------------------------------------------------------------------------
 #   Main window
 # -----------------------------------------------------------------------------
@@ -170,7 +721,7 @@ class SeekSlider(QSlider):
 class AudioPlayer(QMainWindow):
     """Full‑fledged practice audio player exposing loop, speed and range tools."""
 
-    def __init__(self):
+    def __init__(self, control_port=None, control_socket=None):
         super().__init__()
         self.setWindowTitle("Practice Hard!")
         self.setStyleSheet("background-color:#000")
@@ -180,6 +731,10 @@ class AudioPlayer(QMainWindow):
         docs = Path.home() / "Documents" / "Practice Hard"
         docs.mkdir(parents=True, exist_ok=True)
         self.presets_file = str(docs / "presets.json")
+        self.practice_log = PracticeLog(str(docs / "practice.sqlite3"))
+        cache_root = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+        cache_dir = Path(cache_root) / "renders" if cache_root else docs / "cache"
+        self.render_cache = RenderCache(cache_dir, RENDER_CACHE_QUOTA)
         try:
             with open(self.presets_file, "r", encoding="utf-8") as fp:
                 self.presets_data = json.load(fp)
@@ -199,6 +754,13 @@ class AudioPlayer(QMainWindow):
         self.scrubbing = False
         self._skip_pos_updates = 0
         self._resume_after_slice = False
+        self._last_loop_pos = 0
+        self._last_play_pos = None
+        self._played_key = None
+        self._played_ms = 0
+        self._logged_speed = None
+        self._open_gen = 0
+        self._cover_loaders = []
         self.current_path = ""
         self.original_path = ""
 
@@ -210,6 +772,8 @@ class AudioPlayer(QMainWindow):
         self.player.mediaStatusChanged.connect(self._media_status)
         self.player.mediaStatusChanged.connect(self._resume_if_needed)
         self.player.positionChanged.connect(self._ui_pos_changed)
+        self.player.positionChanged.connect(self._track_practice)
+        self.player.stateChanged.connect(self._play_state_changed)
 
         # UI construction ------------------------------------------------------------
         central = QWidget(self)
@@ -233,6 +797,15 @@ class AudioPlayer(QMainWindow):
         self.tick.setInterval(100)
         self.tick.timeout.connect(self._refresh_ui)
         self.tick.start()
+        self.log_flush = QTimer(self)
+        self.log_flush.setInterval(TELEMETRY_FLUSH_MS)
+        self.log_flush.timeout.connect(self.practice_log.flush)
+        self.log_flush.start()
+
+        # Optional pedal / script control server ------------------------------------
+        self.control = None
+        if control_port or control_socket:
+            self._start_control_server(control_port, control_socket)
 
     # -------------------------------------------------------------------------
     #   UI builders
@@ -317,6 +890,8 @@ class AudioPlayer(QMainWindow):
         row.addWidget(self.progress)
         row.addWidget(self.time_lbl)
         self.main.addLayout(row)
+        self.spectrogram = SpectrogramView(self)
+        self.main.addWidget(self.spectrogram)
 
     def _build_volume(self):
         """Create green volume slider with percentage display."""
@@ -339,6 +914,11 @@ class AudioPlayer(QMainWindow):
         self.spd.setStyleSheet(BLUE_SLIM)
         self.slbl = QLabel(self)
         self.spd.valueChanged.connect(lambda v: (self.player.setPlaybackRate(v / 100), self.slbl.setText(f"{v}%")))
+        self.speed_settle = QTimer(self)
+        self.speed_settle.setSingleShot(True)
+        self.speed_settle.setInterval(TELEMETRY_SETTLE_MS)
+        self.speed_settle.timeout.connect(self._speed_settled)
+        self.spd.valueChanged.connect(lambda _: self.speed_settle.start())
         row = QHBoxLayout()
         row.addWidget(QLabel("SPEED:"))
         row.addWidget(self.spd)
@@ -404,6 +984,8 @@ class AudioPlayer(QMainWindow):
         settings.addAction(QAction(f"Edit Speed Presets…  (current: {cur_speed})", self, triggered=self._edit_presets))
         filled_ranges = sum(1 for s, e in self.range_presets if s and e)
         settings.addAction(QAction(f"Edit Range Presets…  (current: {filled_ranges} set)", self, triggered=self._edit_ranges))
+        settings.addSeparator()
+        settings.addAction(QAction("Practice Stats…", self, triggered=self._show_stats))
 
     def _store_presets(self):
         """Persist current speed and range presets to disk."""
@@ -437,6 +1019,9 @@ class AudioPlayer(QMainWindow):
             self._refresh_presets_ui()
             self._store_presets()
 
+    def _show_stats(self):
+        StatsDialog(self.practice_log.totals(), self).exec_()
+
     def _edit_skip(self):
         secs, ok = QInputDialog.getInt(self, "Skip interval", "Jump amount for ← / →  (seconds):", self.skip_ms // 1000, 1, 60, 1)
         if ok:
@@ -457,6 +1042,15 @@ class AudioPlayer(QMainWindow):
         if was_playing and self.player.state() != QMediaPlayer.PlayingState:
             self.player.play()
 
+    def _next_range_preset(self):
+        """Apply the saved range preset following the current one, wrapping around."""
+        filled = [(s, e) for s, e in self.range_presets if s and e]
+        if not filled:
+            return
+        current = (self.start_in.text().strip(), self.end_in.text().strip())
+        idx = filled.index(current) + 1 if current in filled else 0
+        self._apply_preset(*filled[idx % len(filled)])
+
     def _save_current_range(self):
         """Store the currently entered range into the first available preset slot."""
         start, end = self.start_in.text().strip(), self.end_in.text().strip()
@@ -483,17 +1077,33 @@ class AudioPlayer(QMainWindow):
     #   File loading and metadata
     # -------------------------------------------------------------------------
     def _open_file(self):
-        """Show file dialog, load selected audio and associated presets."""
+        """Show file dialog and open the selected audio in stages.
+
+        Title and presets are shown immediately, the media is handed to the
+        player on the next event‑loop pass, and cover art and duration arrive
+        from background work. Opening another file cancels pending stages.
+        """
         path, _ = QFileDialog.getOpenFileName(self, "Open Audio", "", "Audio Files (*.mp3 *.flac *.m4a *.ogg);;All Files (*)")
         if not path:
             return
-        self.player.setMedia(QMediaContent(QUrl.fromLocalFile(path)))
+        self._open_gen += 1
+        gen = self._open_gen
+        for loader in self._cover_loaders:
+            loader.cancelled = True
+        self.player.setMedia(QMediaContent())
+        self._resume_after_slice = False
+        self.play_btn.setEnabled(False)
+        self.set_range.setEnabled(False)
+        self.save_range_btn.setEnabled(False)
+        self.cover.clear()
+        self.play_btn.raise_()
         self.current_path = path
         self.original_path = path
         self.slice_start = 0
         self.slice_end = None
         self.duration = 0
         self.back_btn.setEnabled(False)
+        self.spectrogram.clear()
         self.play_btn.setText("▶")
         base = os.path.splitext(os.path.basename(path))[0]
         meta = MutagenFile(path, easy=True)
@@ -512,40 +1122,35 @@ class AudioPlayer(QMainWindow):
         self._refresh_range_presets_ui()
         self.label.setText(f"🔥 Now Practicing: {base} 🔥")
         self.label.setStyleSheet("font-size:20px;font-weight:bold;color:#FF5733")
-        self.play_btn.setEnabled(True)
-        self.set_range.setEnabled(True)
-        self.save_range_btn.setEnabled(True)
         self.start_in.clear()
         self.end_in.clear()
         self.start_pos = self.end_pos = None
-        self._load_cover(path)
         self._update_loop_overlay()
+        QTimer.singleShot(0, lambda: self._open_media(gen, path))
+        self._load_cover(gen, path)
 
-    def _load_cover(self, path):
-        """Extract and display embedded album art if present."""
-        audio = MutagenFile(path, easy=False)
-        pix = QPixmap()
-        if isinstance(audio, FLAC) and getattr(audio, "pictures", None):
-            pix.loadFromData(audio.pictures[0].data)
-        elif isinstance(audio, MP3):
-            tags = audio.tags or ID3(path)
-            for tag in tags.values():
-                if isinstance(tag, APIC):
-                    pix.loadFromData(tag.data)
-                    break
-        elif isinstance(audio, MP4):
-            covr = audio.tags.get("covr")
-            if covr and isinstance(covr[0], MP4Cover):
-                pix.loadFromData(bytes(covr[0]))
-        elif isinstance(audio, OggVorbis):
-            pic_data = audio.get("metadata_block_picture")
-            if pic_data:
-                raw = base64.b64decode(pic_data[0])
-                pic = Picture()
-                pic.parse(raw)
-                pix.loadFromData(pic.data)
-        if not pix.isNull():
-            self.cover.setPixmap(pix.scaled(500, 500, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation))
+    def _open_media(self, gen, path):
+        """Second open stage: hand the file to the player and enable playback."""
+        if gen != self._open_gen:
+            return
+        self.player.setMedia(QMediaContent(QUrl.fromLocalFile(path)))
+        self.play_btn.setEnabled(True)
+        self.set_range.setEnabled(True)
+        self.save_range_btn.setEnabled(True)
+
+    def _load_cover(self, gen, path):
+        """Start extracting embedded album art for *path* in the background."""
+        loader = CoverLoader(gen, path, self)
+        loader.loaded.connect(self._cover_loaded)
+        loader.finished.connect(lambda w=loader: (self._cover_loaders.remove(w), w.deleteLater()))
+        self._cover_loaders.append(loader)
+        loader.start()
+
+    def _cover_loaded(self, gen, img):
+        """Display decoded album art unless a newer file has been opened since."""
+        if gen != self._open_gen:
+            return
+        self.cover.setPixmap(QPixmap.fromImage(img))
         self.play_btn.raise_()
 
     # -------------------------------------------------------------------------
@@ -599,24 +1204,36 @@ class AudioPlayer(QMainWindow):
     # -------------------------------------------------------------------------
     def _apply_range(self):
         """Render user‑specified range as a looping slice and load it."""
+        if self.player.media().isNull():
+            return
         st, ed = self._parse_time(self.start_in.text()), self._parse_time(self.end_in.text())
         if st is None or ed is None or st >= ed:
             return
         resume_after = self.player.state() == QMediaPlayer.PlayingState
         self.slice_start, self.slice_end = st, ed
-        seg = AudioSegment.from_file(self.current_path)[st:ed]
-        tmp = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-        seg.export(tmp.name, format="wav")
+        key = self.render_cache.key(self.current_path, st, ed)
+        wav_path = self.render_cache.get(key)
+        if wav_path is None:
+            seg = AudioSegment.from_file(self.current_path)[st:ed]
+            wav_path = self.render_cache.put(key, seg)
+            loader = lambda: seg
+        else:
+            loader = lambda: AudioSegment.from_wav(wav_path)
         from PyQt5.QtMultimedia import QMediaPlaylist
         pl = QMediaPlaylist(self.player)
-        pl.addMedia(QMediaContent(QUrl.fromLocalFile(tmp.name)))
+        pl.addMedia(QMediaContent(QUrl.fromLocalFile(wav_path)))
         pl.setPlaybackMode(QMediaPlaylist.CurrentItemInLoop)
         self.player.setPlaylist(pl)
-        self.duration = len(seg)
+        with wave.open(wav_path, "rb") as info:
+            self.duration = info.getnframes() * 1000 // info.getframerate()
         self.progress.setRange(0, self.full_duration)
         self._update_loop_overlay()
+        self.spectrogram.show_range((key, SPEC_FFT, SPEC_COLUMNS), loader)
         self.back_btn.setEnabled(True)
         self._resume_after_slice = resume_after
+        self._last_loop_pos = 0
+        self._log_practice("range")
+        self._publish_state()
 
     def _restore_full_track(self):
         """Return from sliced playback to the original file."""
@@ -629,7 +1246,10 @@ class AudioPlayer(QMainWindow):
         self.duration = self.full_duration
         self.progress.setRange(0, self.full_duration)
         self.back_btn.setEnabled(False)
+        self.spectrogram.clear()
         self._update_loop_overlay()
+        self._log_practice("range")
+        self._publish_state()
 
     def _update_loop_overlay(self):
         """Sync loop markers with current slice (if any)."""
@@ -639,6 +1259,54 @@ class AudioPlayer(QMainWindow):
             self.loop_overlay.set_loop(None, None, 0)
         self.loop_overlay.update()
 
+    def _practice_key(self):
+        """Return (song, start_ms, end_ms, speed) for telemetry; end_ms 0 means full track."""
+        if self.slice_end is not None:
+            return self.current_key, self.slice_start, self.slice_end, self.spd.value()
+        return self.current_key, 0, 0, self.spd.value()
+
+    def _log_practice(self, kind):
+        """Record a practice event for the current range and speed."""
+        if kind != "loop":
+            self._flush_played()
+        if kind == "range":
+            self._last_play_pos = None
+        self.practice_log.record(kind, *self._practice_key())
+
+    def _flush_played(self):
+        """Record accumulated playing time (as wall‑clock ms) against the range and speed it was played at."""
+        if self._played_ms and self._played_key:
+            song, start, end, speed = self._played_key
+            self.practice_log.record("play", song, start, end, speed, self._played_ms * 100 // speed)
+        self._played_ms = 0
+
+    def _play_state_changed(self, _state):
+        self._flush_played()
+        self._last_play_pos = None
+
+    def _speed_settled(self):
+        if self.spd.value() != self._logged_speed:
+            self._logged_speed = self.spd.value()
+            self._log_practice("speed")
+
+    def _track_practice(self, pos: int):
+        """Count loop repetitions and add up position advances while playing."""
+        wrapped = pos < min(BUFFER_MS, self._last_loop_pos) and self._last_loop_pos >= self.duration - BUFFER_MS
+        if self.slice_end is not None and wrapped:
+            self._log_practice("loop")
+        self._last_loop_pos = pos
+        if self.player.state() != QMediaPlayer.PlayingState:
+            self._last_play_pos = None
+            return
+        delta = pos - self._last_play_pos if self._last_play_pos is not None else 0
+        self._last_play_pos = pos
+        if 0 < delta <= TELEMETRY_JUMP_MS:
+            key = self._practice_key()
+            if key != self._played_key:
+                self._flush_played()
+                self._played_key = key
+            self._played_ms += delta
+
     # -------------------------------------------------------------------------
     #   Player callbacks
     # -------------------------------------------------------------------------
@@ -651,6 +1319,8 @@ class AudioPlayer(QMainWindow):
 
     def _media_status(self, status):
         if status == QMediaPlayer.EndOfMedia:
+            if self.slice_end is None:
+                self._log_practice("loop")
             self.player.setPosition(0)
             self.player.play()
 
@@ -724,6 +1394,77 @@ class AudioPlayer(QMainWindow):
         if self.player.state() != QMediaPlayer.PlayingState and not self.scrubbing:
             self._update_slider_and_time(self.player.position())
 
+    # -------------------------------------------------------------------------
+    #   Control server
+    # -------------------------------------------------------------------------
+    def _start_control_server(self, port, socket_path):
+        """Start the local control server and stream player events to it."""
+        self._control_bridge = ControlBridge(self)
+        self._control_bridge.command.connect(self._control_command, Qt.QueuedConnection)
+        server = ControlServer(self._control_bridge, port=port, socket_path=socket_path)
+        try:
+            server.start()
+        except OSError as exc:
+            print(f"Control server disabled: {exc}", file=sys.stderr)
+            return
+        self.control = server
+        self._last_pos_event = 0.0
+        self.player.stateChanged.connect(lambda _: self._publish_state())
+        self.player.positionChanged.connect(self._publish_position)
+        self.spd.valueChanged.connect(lambda _: self._publish_state())
+
+    def _control_command(self, name, args, reply):
+        """Execute a control‑server command on the GUI thread and reply with the new state."""
+        try:
+            if name in ("play", "pause", "toggle"):
+                playing = self.player.state() == QMediaPlayer.PlayingState
+                if name == "toggle" or playing != (name == "play"):
+                    self._toggle_play()
+            elif name == "skip":
+                self._skip(round(float(args[0]) * 1000) if args else self.skip_ms)
+            elif name == "restart":
+                self.player.setPosition(0)
+            elif name == "range":
+                if self.player.media().isNull():
+                    raise ValueError("no file loaded")
+                st, ed = self._parse_time(args[0]), self._parse_time(args[1])
+                if st is None or ed is None or st >= ed:
+                    raise ValueError("invalid range")
+                self._apply_preset(args[0], args[1])
+            elif name == "full":
+                self._restore_full_track()
+            elif name == "speed":
+                self.spd.setValue(int(args[0]))
+            elif name == "next":
+                self._next_range_preset()
+            elif name != "state":
+                raise ValueError(f"unknown command: {name}")
+        except Exception as exc:
+            reply({"ok": False, "error": str(exc) or type(exc).__name__})
+            return
+        reply({"ok": True, **self._control_state()})
+
+    def _control_state(self):
+        """Return a JSON‑serialisable snapshot of the player state."""
+        return {
+            "file": self.original_path,
+            "playing": self.player.state() == QMediaPlayer.PlayingState,
+            "position": self._slice_to_full(self.player.position()),
+            "duration": self.full_duration,
+            "range": [self.slice_start, self.slice_end] if self.slice_end is not None else None,
+            "speed": self.spd.value(),
+        }
+
+    def _publish_state(self):
+        if self.control:
+            self.control.publish({"event": "state", **self._control_state()})
+
+    def _publish_position(self, pos: int):
+        now = time.monotonic()
+        if now - self._last_pos_event >= CONTROL_EVENT_MS / 1000:
+            self._last_pos_event = now
+            self.control.publish({"event": "position", "position": self._slice_to_full(pos)})
+
     # -------------------------------------------------------------------------
     #   Qt overrides
     # -------------------------------------------------------------------------
@@ -748,12 +1489,27 @@ class AudioPlayer(QMainWindow):
             self.loop_overlay.update()
         return super().eventFilter(src, ev)
 
+    def closeEvent(self, ev):
+        self.spectrogram.stop()
+        for loader in list(self._cover_loaders):
+            loader.cancelled = True
+            loader.wait()
+        if self.control:
+            self.control.stop()
+        self._flush_played()
+        self.practice_log.close()
+        super().closeEvent(ev)
+
 
 # -----------------------------------------------------------------------------
 #   Application entry point
 # -----------------------------------------------------------------------------
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    gui = AudioPlayer()
+    parser = argparse.ArgumentParser(description="Practice Hard! audio player")
+    parser.add_argument("--control-port", type=int, help="accept control commands on this localhost TCP port")
+    parser.add_argument("--control-socket", help="accept control commands on this Unix socket path")
+    args, qt_args = parser.parse_known_args()
+    app = QApplication(sys.argv[:1] + qt_args)
+    gui = AudioPlayer(control_port=args.control_port, control_socket=args.control_socket)
     gui.show()
     sys.exit(app.exec_())
@@ -0,0 +1,87 @@
+import pytest
+
+for _mod in ("numpy", "PyQt5.QtMultimedia", "mutagen", "pydub"):
+    pytest.importorskip(_mod)
+
+import practice_hard  # noqa: E402
+from practice_hard import AudioPlayer, QMediaPlayer  # noqa: E402
+
+
+class _Value:
+    def __init__(self, value):
+        self.value_ = value
+
+    def value(self):
+        return self.value_
+
+
+class _Player:
+    def __init__(self):
+        self.state_ = QMediaPlayer.PlayingState
+
+    def state(self):
+        return self.state_
+
+
+class _Log:
+    def __init__(self):
+        self.events = []
+
+    def record(self, kind, song, start_ms, end_ms, speed, ms=0):
+        self.events.append((kind, song, start_ms, end_ms, speed, ms))
+
+
+class _Telemetry:
+    """Bare object carrying only the state AudioPlayer's telemetry methods use."""
+
+    _track_practice = AudioPlayer._track_practice
+    _flush_played = AudioPlayer._flush_played
+    _play_state_changed = AudioPlayer._play_state_changed
+    _practice_key = AudioPlayer._practice_key
+    _log_practice = AudioPlayer._log_practice
+
+    def __init__(self):
+        self.player = _Player()
+        self.spd = _Value(100)
+        self.practice_log = _Log()
+        self.current_key = "Artist - Song"
+        self.slice_start, self.slice_end = 0, None
+        self.duration = 60_000
+        self._last_loop_pos = 0
+        self._last_play_pos = None
+        self._played_key = None
+        self._played_ms = 0
+
+
+def _played(t):
+    return [e for e in t.practice_log.events if e[0] == "play"]
+
+
+def test_played_time_is_accumulated_and_flushed():
+    t = _Telemetry()
+    for pos in (5, 10, 15, 20):
+        t._track_practice(pos)
+    t._play_state_changed(QMediaPlayer.PausedState)
+    assert _played(t) == [("play", "Artist - Song", 0, 0, 100, 15)]
+
+
+def test_seeks_are_not_counted_as_played_time():
+    t = _Telemetry()
+    for pos in (0, 100, 30_000, 30_100):
+        t._track_practice(pos)
+    t._flush_played()
+    assert _played(t) == [("play", "Artist - Song", 0, 0, 100, 200)]
+
+
+def test_speed_change_splits_played_time_at_wall_clock_rate():
+    t = _Telemetry()
+    for pos in (0, 100, 200):
+        t._track_practice(pos)
+    t.spd.value_ = 50
+    for pos in (300, 400):
+        t._track_practice(pos)
+    t._flush_played()
+    assert _played(t) == [
+        ("play", "Artist - Song", 0, 0, 100, 200),
+        ("play", "Artist - Song", 0, 0, 50, 400),
+    ]